@@ -1,17 +1,167 @@
 # src/bancos_reader/core/db.py
 from pathlib import Path
+import queue
 import sqlite3
+import threading
 import pandas as pd
 
+# Filas por executemany (lotes grandes = menos viajes al motor, memoria acotada)
+FILAS_POR_LOTE = 50_000
+
+
+def _ident(nombre) -> str:
+    return '"' + str(nombre).replace('"', '""') + '"'
+
+
+def _tipo_sqlite(dtype) -> str:
+    kind = getattr(dtype, "kind", "O")
+    if kind in "biu":
+        return "INTEGER"
+    if kind == "f":
+        return "REAL"
+    if kind == "M":
+        return "TIMESTAMP"
+    return "TEXT"
+
+
+def _columna_a_lista(s: pd.Series) -> list:
+    """
+    Convierte una columna a escalares nativos de Python (lo que acepta sqlite3);
+    NaN/NaT/NA -> None y fechas al mismo texto que usaba df.to_sql.
+    """
+    if s.dtype.kind == "M":
+        s = s.dt.strftime("%Y-%m-%d %H:%M:%S")
+    valores = s.tolist()
+    nulos = s.isna().to_numpy()
+    if nulos.any():
+        for i in nulos.nonzero()[0]:
+            valores[i] = None
+    return valores
+
+
+class SqliteSink:
+    """
+    Conexión SQLite persistente para volcar DataFrames con executemany
+    en una sola transacción por escritura (en lugar de df.to_sql).
+
+    Con start() las escrituras pasan a un hilo propio: put() solo encola y el
+    hilo junta lo pendiente (hasta filas_por_lote) en una transacción, así el
+    parseo no espera al disco. join()/close() vacían la cola.
+
+    synchronous="OFF" omite los fsync: solo para bases temporales que se
+    pueden regenerar si el proceso se cae a mitad de escritura.
+    """
+
+    def __init__(self, ruta_db: str | Path, filas_por_lote: int = FILAS_POR_LOTE, synchronous: str = "NORMAL"):
+        self.ruta_db = Path(ruta_db)
+        self.filas_por_lote = filas_por_lote
+        # la conexión la puede usar el hilo escritor; el acceso siempre es de uno a la vez
+        self.conn = sqlite3.connect(self.ruta_db, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        self.conn.execute(f"PRAGMA synchronous={synchronous};")
+        self.conn.execute("PRAGMA temp_store=MEMORY;")
+        self._cola: queue.Queue | None = None
+        self._hilo: threading.Thread | None = None
+        self._error: Exception | None = None
+
+    def __enter__(self) -> "SqliteSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        try:
+            self.join()
+        finally:
+            self.conn.close()
+
+    def _insertar(self, df: pd.DataFrame, nombre_tabla: str) -> None:
+        """Crea la tabla si hace falta e inserta por lotes (sin abrir/cerrar transacción)."""
+        tipos = ", ".join(f"{_ident(c)} {_tipo_sqlite(df[c].dtype)}" for c in df.columns)
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS {_ident(nombre_tabla)} ({tipos})")
+
+        cols = ", ".join(_ident(c) for c in df.columns)
+        qmarks = ", ".join("?" for _ in df.columns)
+        sql = f"INSERT INTO {_ident(nombre_tabla)} ({cols}) VALUES ({qmarks})"
+
+        # Conversión a escalares de Python por tramo: el pico de memoria es un lote,
+        # no una copia fila-a-fila de todo el DataFrame
+        for inicio in range(0, len(df), self.filas_por_lote):
+            tramo = df.iloc[inicio:inicio + self.filas_por_lote]
+            self.conn.executemany(sql, zip(*(_columna_a_lista(tramo[c]) for c in tramo.columns)))
+
+    def guardar(self, df: pd.DataFrame, nombre_tabla: str) -> None:
+        self.guardar_varios([(df, nombre_tabla)])
+
+    def guardar_varios(self, escrituras: list[tuple[pd.DataFrame, str]]) -> None:
+        """Varias tablas en una sola transacción (un commit para todas)."""
+        with self.conn:
+            for df, nombre_tabla in escrituras:
+                self._insertar(df, nombre_tabla)
+
+    # --- escritura en segundo plano ---
+    def start(self) -> "SqliteSink":
+        if self._hilo is None:
+            self._cola = queue.Queue()
+            self._hilo = threading.Thread(target=self._writer, name="SqliteSink", daemon=True)
+            self._hilo.start()
+        return self
+
+    def put(self, df: pd.DataFrame, nombre_tabla: str) -> None:
+        if self._hilo is None:
+            self.guardar(df, nombre_tabla)
+            return
+        self._cola.put((df, nombre_tabla))
+
+    def join(self) -> None:
+        """Espera a que se escriba todo lo encolado; relanza el primer error del hilo."""
+        if self._hilo is None:
+            return
+        self._cola.put(None)
+        self._hilo.join()
+        self._hilo = None
+        self._cola = None
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _writer(self) -> None:
+        fin = False
+        while not fin:
+            item = self._cola.get()
+            if item is None:
+                return
+
+            # Junta lo que ya esté encolado en la misma transacción
+            pendientes = [item]
+            filas = len(item[0])
+            while filas < self.filas_por_lote:
+                try:
+                    item = self._cola.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    fin = True
+                    break
+                pendientes.append(item)
+                filas += len(item[0])
+
+            try:
+                self.guardar_varios(pendientes)
+            except Exception as e:
+                if self._error is None:
+                    self._error = e
+
+
 def init_db(ruta_db: str) -> None:
     ruta_db = Path(ruta_db)
     conn = sqlite3.connect(ruta_db)
     conn.close()
 
 def guardar_movimientos(df: pd.DataFrame, ruta_db: str, nombre_tabla: str) -> None:
-    ruta_db = Path(ruta_db)
-    with sqlite3.connect(ruta_db) as conn:
-        df.to_sql(nombre_tabla, conn, if_exists="append", index=False)
+    with SqliteSink(ruta_db) as sink:
+        sink.guardar(df, nombre_tabla)
 
 def listar_tablas(ruta_db: Path) -> list[str]:
     if not ruta_db.exists():
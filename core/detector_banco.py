@@ -3,12 +3,25 @@
 from __future__ import annotations
 
 from pathlib import Path
+import os
 import re
 import pdfplumber
 
 from bancos_reader.parsers.bbva import BBVAParser
 from bancos_reader.parsers.bbva_tc import BBVATCParser
-from bancos_reader.parsers.base import BaseParser
+from bancos_reader.parsers.base import BaseParser, abrir_pdf
+
+
+# Normalizadores y patrones TC por nombre (compilados una sola vez)
+_RX_SEPARADORES = re.compile(r"[_\-\.\(\)\[\]\{\}]+")
+_RX_ESPACIOS = re.compile(r"\s+")
+_RX_NOMBRE_TC = re.compile(r"\b(?:TC|TDC|TARJETA|CREDITO|CR[EÉ]DITO)\b")
+
+_RX_MONEDA = re.compile(r"\b(MXN|USD)\b")
+_RX_CUENTA = re.compile(r"\b(\d{4})\b")  # 4 dígitos tipo 5516, 2697, 9999
+_RX_ANIO = re.compile(r"\b(20\d{2})\b")
+# Aunque haya moneda + cuenta, con estos tokens el nombre no descarta TC
+_TOKENS_NOMBRE_AMBIGUO = ("CUENTA", "ESTADO")
 
 
 def _nombre_indica_tc(nombre_archivo: str) -> bool:
@@ -19,26 +32,20 @@ def _nombre_indica_tc(nombre_archivo: str) -> bool:
     s = (nombre_archivo or "").upper()
 
     # normaliza separadores a espacios
-    s = re.sub(r"[_\-\.\(\)\[\]\{\}]+", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _RX_SEPARADORES.sub(" ", s)
+    s = _RX_ESPACIOS.sub(" ", s).strip()
 
-    patrones = [
-        r"\bTC\b",
-        r"\bTDC\b",
-        r"\bTARJETA\b",
-        r"\bCREDITO\b",
-        r"\bCR[EÉ]DITO\b",
-    ]
-    return any(re.search(p, s) for p in patrones)
+    return _RX_NOMBRE_TC.search(s) is not None
 
 
-def _es_bbva_tc_por_contenido(ruta_pdf: str) -> bool:
+def _es_bbva_tc_por_contenido(ruta_pdf: str, pdf: pdfplumber.PDF | None = None) -> bool:
     """
     Fallback: Detecta TC por contenido leyendo SOLO la primera página.
     Útil si el nombre no trae 'TC', pero el PDF sí es TC.
+    Si `pdf` ya viene abierto se reutiliza (el parser lo usará después).
     """
     try:
-        with pdfplumber.open(ruta_pdf) as pdf:
+        with abrir_pdf(ruta_pdf, pdf) as pdf:
             texto = (pdf.pages[0].extract_text() or "").upper()
 
         claves_tc = [
@@ -54,25 +61,133 @@ def _es_bbva_tc_por_contenido(ruta_pdf: str) -> bool:
         return False
 
 
-def get_parser_for_file(ruta_pdf: str) -> BaseParser | None:
+# Parser elegido por archivo: (clase, kwargs) | None
+_EspecParser = tuple[type[BaseParser], dict] | None
+
+# (ruta absoluta, mtime_ns, tamaño) -> _EspecParser. Re-exportar los mismos PDFs no
+# vuelve a abrirlos para el sniff de TC; si el archivo cambia, cambia la clave.
+_CACHE_DETECCION: dict[tuple[str, int, int], _EspecParser] = {}
+_MAX_CACHE_DETECCION = 4096
+
+
+def _anio_desde_nombre(nombre: str, cuenta: str | None) -> str | None:
+    """
+    Año del periodo si el nombre lo trae sin ambigüedad (p.ej. 'BBVA MXN 5516 JUL 2025.pdf').
+    Solo cuenta si hay exactamente un token 20xx distinto de la cuenta; con cero o con
+    varios se devuelve None y el parser lee el año de la portada.
+    """
+    s = _RX_SEPARADORES.sub(" ", nombre)
+    candidatos = {m.group(1) for m in _RX_ANIO.finditer(s)} - {cuenta}
+    if len(candidatos) == 1:
+        return candidatos.pop()
+    return None
+
+
+def _clave_archivo(ruta_pdf: str) -> tuple[str, int, int] | None:
+    try:
+        st = os.stat(ruta_pdf)
+    except OSError:
+        return None
+    return (os.path.abspath(ruta_pdf), st.st_mtime_ns, st.st_size)
+
+
+def _abrir_para_sniff(ruta_pdf: str) -> pdfplumber.PDF | None:
+    # Si no abre, el sniff da False (como antes) y el error real lo reporta el parser
+    try:
+        return pdfplumber.open(ruta_pdf)
+    except Exception:
+        return None
+
+
+def _detectar_parser(
+    ruta_pdf: str, pdf: pdfplumber.PDF | None = None
+) -> tuple[_EspecParser, pdfplumber.PDF | None]:
+    """
+    Decide primero por nombre; el PDF solo se abre si hace falta mirar el contenido.
+    Devuelve (espec, pdf): el PDF recibido o el que se abrió aquí (o None).
+    """
     nombre = Path(ruta_pdf).name.upper()
 
     if "BBVA" in nombre:
         # 1) TC por nombre
-        if _nombre_indica_tc(nombre) or _es_bbva_tc_por_contenido(ruta_pdf):
-            return BBVATCParser(cuenta_por_defecto="TC", moneda_por_defecto="MXN")
+        if _nombre_indica_tc(nombre):
+            return (BBVATCParser, {"cuenta_por_defecto": "TC", "moneda_por_defecto": "MXN"}), pdf
+
+        m_moneda = _RX_MONEDA.search(nombre)
+        m_cuenta = _RX_CUENTA.search(nombre)
+
+        # 1b) TC por contenido: solo si el nombre es ambiguo. Moneda + cuenta sin
+        #     tokens genéricos ya indica cuenta de débito y evita leer la portada.
+        nombre_indica_cuenta = bool(m_moneda and m_cuenta) and not any(
+            t in nombre for t in _TOKENS_NOMBRE_AMBIGUO
+        )
+        if not nombre_indica_cuenta:
+            if pdf is None:
+                pdf = _abrir_para_sniff(ruta_pdf)
+            if pdf is not None and _es_bbva_tc_por_contenido(ruta_pdf, pdf):
+                return (BBVATCParser, {"cuenta_por_defecto": "TC", "moneda_por_defecto": "MXN"}), pdf
 
         # 2) Cuenta + moneda por nombre (genérico)
-        m_moneda = re.search(r"\b(MXN|USD)\b", nombre)
-        m_cuenta = re.search(r"\b(\d{4})\b", nombre)  # 4 dígitos tipo 5516, 2697, 9999
-
         if m_moneda and m_cuenta:
             moneda = m_moneda.group(1)
             cuenta = m_cuenta.group(1)
-            return BBVAParser(cuenta_por_defecto=cuenta, moneda_por_defecto=moneda)
+            return (BBVAParser, {
+                "cuenta_por_defecto": cuenta,
+                "moneda_por_defecto": moneda,
+                "anio_por_defecto": _anio_desde_nombre(nombre, cuenta),
+            }), pdf
 
-        # 3) Fallback final
-        return BBVAParser()
+        # 3) Fallback final (el primer token de 4 dígitos puede ser la cuenta, no el año)
+        cuenta = m_cuenta.group(1) if m_cuenta else None
+        return (BBVAParser, {"anio_por_defecto": _anio_desde_nombre(nombre, cuenta)}), pdf
 
-    return None
+    return None, pdf
+
+
+def deteccion_en_cache(ruta_pdf: str) -> _EspecParser:
+    """(clase, kwargs) ya detectado para este archivo sin cambios, o None si no está."""
+    clave = _clave_archivo(ruta_pdf)
+    return _CACHE_DETECCION.get(clave) if clave is not None else None
 
+
+def guardar_deteccion(ruta_pdf: str, espec: _EspecParser) -> None:
+    """
+    Registra una detección hecha en otro proceso (los workers de parseo son nuevos en
+    cada exportación; la caché útil es la del proceso de la UI).
+    """
+    clave = _clave_archivo(ruta_pdf)
+    if clave is None:
+        return
+    if len(_CACHE_DETECCION) >= _MAX_CACHE_DETECCION:
+        _CACHE_DETECCION.clear()
+    _CACHE_DETECCION[clave] = espec
+
+
+def detectar_parser(
+    ruta_pdf: str, pdf: pdfplumber.PDF | None = None
+) -> tuple[_EspecParser, pdfplumber.PDF | None]:
+    """
+    Devuelve (espec, pdf) usando la caché. Los archivos que se resuelven por nombre no
+    se abren; si el detector tuvo que abrir el PDF, devuelve esa sesión para que el
+    parser la reutilice y quien llama la cierra. Si se pasó `pdf`, se devuelve el mismo.
+    """
+    espec = deteccion_en_cache(ruta_pdf)
+    if espec is None:
+        espec, pdf = _detectar_parser(ruta_pdf, pdf)
+        guardar_deteccion(ruta_pdf, espec)
+    return espec, pdf
+
+
+def crear_parser(espec: _EspecParser) -> BaseParser | None:
+    if espec is None:
+        return None
+    clase, kwargs = espec
+    return clase(**kwargs)  # instancia nueva: los parsers guardan estado por archivo
+
+
+def get_parser_for_file(
+    ruta_pdf: str, pdf: pdfplumber.PDF | None = None
+) -> tuple[BaseParser | None, pdfplumber.PDF | None]:
+    """Devuelve (parser, pdf); ver detectar_parser."""
+    espec, pdf = detectar_parser(ruta_pdf, pdf)
+    return crear_parser(espec), pdf
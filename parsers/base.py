@@ -1,8 +1,24 @@
 # src/bancos_reader/parsers/base.py
 
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator
 import pandas as pd
+import pdfplumber
+
+
+@contextmanager
+def abrir_pdf(ruta_pdf: str | Path, pdf: pdfplumber.PDF | None = None) -> Iterator[pdfplumber.PDF]:
+    """
+    Reutiliza un PDF ya abierto si se recibe; si no, lo abre (y lo cierra al salir).
+    Así el detector y el parser comparten una sola sesión de pdfplumber por archivo.
+    """
+    if pdf is not None:
+        yield pdf
+        return
+    with pdfplumber.open(str(ruta_pdf)) as abierto:
+        yield abierto
 
 
 class BaseParser(ABC):
@@ -13,9 +29,10 @@ class BaseParser(ABC):
     nombre_banco: str = "BASE"
 
     @abstractmethod
-    def parse_movimientos(self, ruta_pdf: str) -> pd.DataFrame:
+    def parse_movimientos(self, ruta_pdf: str, pdf: pdfplumber.PDF | None = None) -> pd.DataFrame:
         """
         Lee un PDF de estado de cuenta y devuelve un DataFrame con los movimientos.
+        Si `pdf` viene abierto (p.ej. desde el detector), se usa en lugar de reabrir el archivo.
         Las columnas mínimas recomendadas:
         fecha, descripcion, referencia, cargo, abono, saldo, cuenta, moneda, origen_pdf, pagina
         """
@@ -1,16 +1,35 @@
 from pathlib import Path
 from typing import List, Dict, Optional
+from operator import itemgetter
+import bisect
 import re
 
+import numpy as np
 import pandas as pd
 
-from .base import BaseParser
+from .base import BaseParser, abrir_pdf
 from bancos_reader.pdf_utils.reader import leer_tablas_pdf
 import pdfplumber
 
 PATRON_FECHA = re.compile(r"\d{2}/[A-Z]{3}")
 PATRON_MONTO = re.compile(r"^[\d,]+\.\d{2}$")
 
+# Orden de lectura de palabras (arriba-abajo, izquierda-derecha)
+_ORDEN_LECTURA = itemgetter("top", "x0")
+
+# Columnas que varían por movimiento (cuenta/moneda/origen_pdf son constantes por PDF)
+_COLUMNAS_PAGINA = (
+    "fecha_operacion", "fecha_liquidacion", "codigo", "descripcion",
+    "cargos", "abonos", "saldo_operacion", "saldo_liquidacion",
+    "detalle", "pagina",
+)
+
+# 1,234.56 -> 1234.56: '$', espacios y comas de miles fuera en una sola pasada
+_TR_MONTO = str.maketrans("", "", "$ ,")
+# 1234,56 -> 1234.56 (coma decimal, sin punto)
+_TR_MONTO_EU = str.maketrans(",", ".", "$ ")
+
+
 def _limpiar_monto(valor) -> Optional[float]:
     if valor is None:
         return None
@@ -18,49 +37,50 @@ def _limpiar_monto(valor) -> Optional[float]:
     if txt == "" or txt == "-":
         return None
 
-    txt = txt.replace("$", "").replace(" ", "")
-
-    if "," in txt and "." in txt:
-        txt = txt.replace(",", "")
+    if "," in txt and "." not in txt:
+        txt = txt.translate(_TR_MONTO_EU)
     else:
-        if "," in txt and "." not in txt:
-            txt = txt.replace(".", "").replace(",", ".")
+        txt = txt.translate(_TR_MONTO)
 
     # dejamos el signo como venga; no invertimos nada
     try:
-        return float(txt.replace("-", "")) if txt.count("-") == 1 and txt.startswith("-") else float(txt)
+        return float(txt)
     except ValueError:
         return None
 
 
+_MAPA_MES = {
+    "ENE": "01", "FEB": "02", "MAR": "03", "ABR": "04",
+    "MAY": "05", "JUN": "06", "JUL": "07", "AGO": "08",
+    "SEP": "09", "OCT": "10", "NOV": "11", "DIC": "12",
+}
+
+
 def _mes_str_a_num(mes: str) -> str:
-    mes = mes.upper()
-    mapa = {
-        "ENE": "01", "FEB": "02", "MAR": "03", "ABR": "04",
-        "MAY": "05", "JUN": "06", "JUL": "07", "AGO": "08",
-        "SEP": "09", "OCT": "10", "NOV": "11", "DIC": "12",
-    }
-    return mapa.get(mes, "01")
+    return _MAPA_MES.get(mes.upper(), "01")
 
 
 def _fecha_ddmes_a_iso(fecha_ddmes: str, anio: str) -> str:
     """
     Convierte '01/JUL' y '2025' en '2025-07-01'
     """
-    m = re.match(r"^(\d{2})/([A-Z]{3})$", fecha_ddmes.upper())
-    if not m:
+    # Chequeo por posición (dd/MES) en vez de regex: corre dos veces por movimiento
+    s = fecha_ddmes.upper()
+    dia, mes = s[:2], s[3:]
+    if len(s) != 6 or s[2] != "/" or not dia.isdigit() or not (mes.isascii() and mes.isalpha()):
         return fecha_ddmes  # fallback crudo
-    dia = m.group(1)
-    mes = _mes_str_a_num(m.group(2))
-    return f"{anio}-{mes}-{dia}"
+    return f"{anio}-{_MAPA_MES.get(mes, '01')}-{dia}"
 
 
 class BBVAParser(BaseParser):
     nombre_banco = "BBVA"
 
-    def __init__(self, cuenta_por_defecto: str | None = None, moneda_por_defecto: str | None = None):
+    def __init__(self, cuenta_por_defecto: str | None = None, moneda_por_defecto: str | None = None,
+                 anio_por_defecto: str | None = None):
         self.cuenta_por_defecto = cuenta_por_defecto
         self.moneda_por_defecto = moneda_por_defecto or "MXN"
+        # Año conocido de antemano (p.ej. por nombre de archivo); si no, se lee de la portada
+        self.anio_por_defecto = anio_por_defecto
         
     # --- NUEVO: helper para convertir '01/JUL' + '2025' a '2025-07-01' ---
     def _parse_fecha(self, fecha_ddmes: str, anio: str | None) -> str:
@@ -72,136 +92,152 @@ class BBVAParser(BaseParser):
             # si no se detectó año en la portada, podemos usar un default
             anio = "2025"
 
-        fecha_ddmes = fecha_ddmes.strip().upper()
-        m = re.match(r"^(\d{2})/([A-Z]{3})$", fecha_ddmes)
-        if not m:
-            return fecha_ddmes
-
-        dia = m.group(1)
-        mes = _mes_str_a_num(m.group(2))
-        return f"{anio}-{mes}-{dia}"
+        return _fecha_ddmes_a_iso(fecha_ddmes.strip().upper(), anio)
 
 
     # ------------------ MÉTODO 2: texto, el importante ------------------
-    def parse_movimientos(self, ruta_pdf: str | Path) -> pd.DataFrame:
+    def parse_movimientos(self, ruta_pdf: str | Path, pdf: pdfplumber.PDF | None = None) -> pd.DataFrame:
         """
         Parser por layout: usa pdfplumber.extract_words()...
         """
         ruta_pdf = Path(ruta_pdf)
         cuenta = self.cuenta_por_defecto or ruta_pdf.stem
         moneda = self.moneda_por_defecto
-        movimientos = []
-
-        with pdfplumber.open(str(ruta_pdf)) as pdf:
-            # Texto de la portada (página 0)
-            texto_portada = pdf.pages[0].extract_text() or ""
-            anio = self._obtener_anio_desde_portada(texto_portada)
-
-
+        # Acumulación por columna (SoA): evita un dict por movimiento y la
+        # inferencia de tipos fila a fila de pd.DataFrame(list[dict])
+        cols: dict[str, list] = {k: [] for k in _COLUMNAS_PAGINA}
+
+        with abrir_pdf(ruta_pdf, pdf) as pdf:
+            # Año: el que ya se conoce o, si no, el del texto de la portada (página 0)
+            anio = self.anio_por_defecto
+            portada_up = None
+            if not anio:
+                texto_portada = pdf.pages[0].extract_text() or ""
+                anio = self._obtener_anio_desde_portada(texto_portada)
+                portada_up = texto_portada.upper()
+
+            # Cada página es independiente una vez conocido el año. Se recorren en
+            # serie: pdfplumber no es thread-safe sobre el mismo documento y el
+            # paralelismo real (por archivo, en procesos) vive en la capa de UI.
             for num_pagina, page in enumerate(pdf.pages, start=1):
-                # Solo saltar si parece portada (sin encabezados de tabla)
-                txt = (page.extract_text() or "").upper()
-                if num_pagina == 1 and ("CARGOS" not in txt or "ABONOS" not in txt):
-                    continue
-
-                words = page.extract_words()
-                col_centers = self._detectar_columnas_montos(words)
-                if not col_centers:
-                    continue
-
-                filas = self._agrupar_filas(words)
-                idx_ultimo_mov = None
-
-                for fila in filas:
-                    texto_fila = " ".join(w["text"] for w in fila).strip()
-                    if not texto_fila:
+                words = None
+
+                # Solo saltar si parece portada (sin encabezados de tabla). Si no se leyó
+                # el texto de la portada, basta con las palabras que de todos modos se usan
+                if num_pagina == 1:
+                    if portada_up is None:
+                        words = page.extract_words()
+                        portada_up = " ".join(w["text"] for w in words).upper()
+                    if "CARGOS" not in portada_up or "ABONOS" not in portada_up:
                         continue
-                    
-                    texto_fila_upper = texto_fila.upper()
-
-                    # Corta al llegar a la sección de totales (última parte de la hoja)
-                    if "TOTAL DE MOVIMIENTOS" in texto_fila_upper or "TOTAL MOVIMIENTOS" in texto_fila_upper:
-                        break
-
-                    # 1) Detectar si esta fila es un movimiento (tiene dos fechas dd/MES)
-                    textos = [w["text"] for w in fila]
-                    idx_fechas = [i for i, t in enumerate(textos) if PATRON_FECHA.fullmatch(t)]
-                    if len(idx_fechas) >= 2:
-                        # Movimiento principal
-                        i1, i2 = idx_fechas[0], idx_fechas[1]
-                        fecha_op_raw = textos[i1]
-                        fecha_liq_raw = textos[i2]
-
-                        fecha_op = self._parse_fecha(fecha_op_raw, anio)
-                        fecha_liq = self._parse_fecha(fecha_liq_raw, anio)
-
-                        # Código justo después de la segunda fecha
-                        codigo = textos[i2 + 1] if len(textos) > i2 + 1 else ""
-
-                        # Descripción: palabras entre código y la primera cantidad,
-                        # pero solo las que están a la izquierda de la primera columna de montos
-                        x_cargos = col_centers["CARGOS"]
-                        desc_words = []
-                        for w in fila:
-                            x_centro = (w["x0"] + w["x1"]) / 2
-                            if x_centro >= x_cargos:
-                                continue
-                            if w["text"] in (fecha_op_raw, fecha_liq_raw, codigo):
-                                continue
-                            desc_words.append(w["text"])
-
-                        descripcion = " ".join(desc_words).strip()
-
-                        # 2) Montos por columna usando la X real
-                        cargos = abonos = saldo_oper = saldo_liq = None
-
-                        for w in fila:
-                            txt = w["text"]
-                            if PATRON_MONTO.fullmatch(txt):
-                                val = _limpiar_monto(txt)   # ← función global, sin self
-                                x_centro = (w["x0"] + w["x1"]) / 2
-                                col = self._columna_por_x(x_centro, col_centers)
-
-                                if col == "CARGOS":
-                                    cargos = val
-                                elif col == "ABONOS":
-                                    abonos = val
-                                elif col == "OPERACION":
-                                    saldo_oper = val
-                                elif col == "LIQUIDACION":
-                                    saldo_liq = val
-
-                        movimientos.append({
-                            "fecha_operacion": fecha_op,
-                            "fecha_liquidacion": fecha_liq,
-                            "codigo": codigo,
-                            "descripcion": descripcion,
-                            "cargos": cargos,
-                            "abonos": abonos,
-                            "saldo_operacion": saldo_oper,
-                            "saldo_liquidacion": saldo_liq,
-                            "detalle": "",
-                            "cuenta": cuenta,
-                            "moneda": moneda,
-                            "origen_pdf": ruta_pdf.name,
-                            "pagina": num_pagina,
-                        })
-                        idx_ultimo_mov = len(movimientos) - 1
-
-                    else:
-                        # No hay 2 fechas → probablemente es una línea de detalle
-                        if idx_ultimo_mov is not None:
-                            extra = texto_fila
-                            if extra and not extra.startswith("FECHA SALDO"):
-                                anterior = movimientos[idx_ultimo_mov].get("detalle", "")
-                                movimientos[idx_ultimo_mov]["detalle"] = (
-                                    (anterior + " | " + extra) if anterior else extra
-                                )
-
-        if not movimientos:
+
+                if words is None:
+                    words = page.extract_words()
+                self._parse_pagina(words, num_pagina, anio, cols)
+
+        if not cols["pagina"]:
             return pd.DataFrame()
 
-        return pd.DataFrame(movimientos)
+        return pd.DataFrame({
+            "fecha_operacion": cols["fecha_operacion"],
+            "fecha_liquidacion": cols["fecha_liquidacion"],
+            "codigo": cols["codigo"],
+            "descripcion": cols["descripcion"],
+            "cargos": np.array(cols["cargos"], dtype=np.float64),
+            "abonos": np.array(cols["abonos"], dtype=np.float64),
+            "saldo_operacion": np.array(cols["saldo_operacion"], dtype=np.float64),
+            "saldo_liquidacion": np.array(cols["saldo_liquidacion"], dtype=np.float64),
+            "detalle": cols["detalle"],
+            "cuenta": cuenta,
+            "moneda": moneda,
+            "origen_pdf": ruta_pdf.name,
+            "pagina": np.array(cols["pagina"], dtype=np.int64),
+        })
+
+
+    def _parse_pagina(self, words: list[dict], num_pagina: int, anio: str | None, cols: dict[str, list]) -> None:
+        """
+        Extrae los movimientos de una sola página y los agrega a `cols` (una lista
+        por columna). No depende de otras páginas: las líneas de detalle solo se
+        pegan a movimientos de la misma hoja.
+        """
+        col_centers = self._detectar_columnas_montos(words)
+        if not col_centers:
+            return
+
+        filas = self._agrupar_filas(words)
+        idx_ultimo_mov = None
+        x_cargos = col_centers["CARGOS"]
+        nombres_cols, limites_cols = self._limites_columnas(col_centers)
+
+        for fila in filas:
+            textos = [w["text"] for w in fila]
+            texto_fila = " ".join(textos).strip()
+            if not texto_fila:
+                continue
+
+            texto_fila_upper = texto_fila.upper()
+
+            # Corta al llegar a la sección de totales (última parte de la hoja)
+            if "TOTAL DE MOVIMIENTOS" in texto_fila_upper or "TOTAL MOVIMIENTOS" in texto_fila_upper:
+                break
+
+            # 1) Detectar si esta fila es un movimiento (tiene dos fechas dd/MES)
+            idx_fechas = [i for i, t in enumerate(textos) if PATRON_FECHA.fullmatch(t)]
+            if len(idx_fechas) >= 2:
+                # Movimiento principal
+                i1, i2 = idx_fechas[0], idx_fechas[1]
+                fecha_op_raw = textos[i1]
+                fecha_liq_raw = textos[i2]
+
+                fecha_op = self._parse_fecha(fecha_op_raw, anio)
+                fecha_liq = self._parse_fecha(fecha_liq_raw, anio)
+
+                # Código justo después de la segunda fecha
+                codigo = textos[i2 + 1] if len(textos) > i2 + 1 else ""
+
+                # Una sola pasada por palabra:
+                # - Descripción: palabras a la izquierda de la primera columna de montos
+                #   (sin las fechas ni el código)
+                # - Montos por columna usando la X real
+                excluir = (fecha_op_raw, fecha_liq_raw, codigo)
+                desc_words = []
+                montos = {}
+                for w, txt in zip(fila, textos):
+                    x_centro = (w["x0"] + w["x1"]) / 2
+                    if x_centro < x_cargos and txt not in excluir:
+                        desc_words.append(txt)
+                    if PATRON_MONTO.fullmatch(txt):
+                        montos[self._columna_por_x(x_centro, nombres_cols, limites_cols)] = _limpiar_monto(txt)
+
+                descripcion = " ".join(desc_words).strip()
+                cargos = montos.get("CARGOS")
+                abonos = montos.get("ABONOS")
+                saldo_oper = montos.get("OPERACION")
+                saldo_liq = montos.get("LIQUIDACION")
+
+                cols["fecha_operacion"].append(fecha_op)
+                cols["fecha_liquidacion"].append(fecha_liq)
+                cols["codigo"].append(codigo)
+                cols["descripcion"].append(descripcion)
+                cols["cargos"].append(cargos)
+                cols["abonos"].append(abonos)
+                cols["saldo_operacion"].append(saldo_oper)
+                cols["saldo_liquidacion"].append(saldo_liq)
+                cols["detalle"].append("")
+                cols["pagina"].append(num_pagina)
+                idx_ultimo_mov = len(cols["pagina"]) - 1
+
+            else:
+                # No hay 2 fechas → probablemente es una línea de detalle
+                if idx_ultimo_mov is not None:
+                    extra = texto_fila
+                    if extra and not extra.startswith("FECHA SALDO"):
+                        detalles = cols["detalle"]
+                        anterior = detalles[idx_ultimo_mov]
+                        detalles[idx_ultimo_mov] = (
+                            (anterior + " | " + extra) if anterior else extra
+                        )
 
 
     def _obtener_anio_desde_portada(self, texto: str) -> Optional[str]:
@@ -240,18 +276,22 @@ class BBVAParser(BaseParser):
         if not hits:
             return None
 
-        # 2) agrupar por fila (top similar)
-        hits.sort(key=lambda ww: (ww["top"], ww["x0"]))
+        # 2) agrupar por fila (top similar): un solo barrido sobre hits ordenados,
+        #    comparando solo contra el grupo abierto (los anteriores ya quedan más arriba)
+        hits.sort(key=_ORDEN_LECTURA)
         grupos = []
+        actual = []
+        top_actual = None
         for w in hits:
-            colocado = False
-            for g in grupos:
-                if abs(w["top"] - g[0]["top"]) <= tol_fila:
-                    g.append(w)
-                    colocado = True
-                    break
-            if not colocado:
-                grupos.append([w])
+            if top_actual is not None and abs(w["top"] - top_actual) > tol_fila:
+                grupos.append(actual)
+                actual = []
+                top_actual = None
+            if top_actual is None:
+                top_actual = w["top"]
+            actual.append(w)
+        if actual:
+            grupos.append(actual)
 
         # 3) candidatos: grupos que tengan las 4 columnas
         candidatos = []
@@ -276,18 +316,21 @@ class BBVAParser(BaseParser):
     def _agrupar_filas(words, tol=2.0):
         """
         Agrupa las palabras en filas usando la coordenada 'top'.
+        Un solo barrido sobre las palabras ordenadas; la clave de orden es un
+        itemgetter (C) en lugar de una lambda por palabra.
         """
         rows = []
         current = []
         current_top = None
 
-        for w in sorted(words, key=lambda ww: (ww["top"], ww["x0"])):
+        for w in sorted(words, key=_ORDEN_LECTURA):
+            top = w["top"]
             if current_top is None:
-                current_top = w["top"]
-            elif abs(w["top"] - current_top) > tol:
+                current_top = top
+            elif abs(top - current_top) > tol:
                 rows.append(current)
                 current = []
-                current_top = w["top"]
+                current_top = top
             current.append(w)
 
         if current:
@@ -296,12 +339,22 @@ class BBVAParser(BaseParser):
         return rows
 
     @staticmethod
-    def _columna_por_x(x, col_centers):
+    def _limites_columnas(col_centers):
+        """
+        Ordena las columnas por X y calcula los puntos medios entre centros vecinos
+        (una vez por página), para clasificar cada monto con bisect.
+        """
+        nombres, centros = zip(*sorted(col_centers.items(), key=lambda kv: kv[1]))
+        limites = [(centros[i] + centros[i + 1]) / 2 for i in range(len(centros) - 1)]
+        return nombres, limites
+
+    @staticmethod
+    def _columna_por_x(x, nombres, limites):
         """
         Devuelve el nombre de columna ('CARGOS', 'ABONOS', 'OPERACION', 'LIQUIDACION')
         más cercana al centro X dado.
         """
-        return min(col_centers.items(), key=lambda kv: abs(x - kv[1]))[0]
+        return nombres[bisect.bisect(limites, x)]
     
     def crear_tablas_meses(self, df):
         
@@ -2,14 +2,16 @@
 
 from __future__ import annotations
 
+from datetime import date
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Optional
 import re
 
+import numpy as np
 import pandas as pd
 import pdfplumber
 
-from .base import BaseParser
+from .base import BaseParser, abrir_pdf
 
 
 # Fechas TC: 08/01/25 o 08/01/2025
@@ -17,32 +19,68 @@ PATRON_FECHA_TC = re.compile(r"^\d{2}/\d{2}/\d{2,4}$")
 # Monto TC: 1,071.00 o -12,432.34
 PATRON_MONTO_TC = re.compile(r"^-?[\d,]+\.\d{2}$")
 
+# Línea de movimiento, con RFC opcional (un solo match por línea):
+#   con RFC: "... AME 1404027R0 ******7111 $ 399.00"
+#   sin RFC (ej pago): "... PAGO TDC ******0110 $ -12,432.34"
+PATRON_MOV_TC = re.compile(
+    r"^(?P<f1>\d{2}/\d{2}/\d{2,4})\s+"
+    r"(?P<f2>\d{2}/\d{2}/\d{2,4})\s+"
+    r"(?P<concepto>.+?)\s+"
+    r"(?:(?P<rfc1>[A-ZÑ&]{3})\s+(?P<rfc2>[0-9A-Z]{8,12})\s+)?"
+    r"(?P<ref>[\*Xx\d]{4,})\s+"
+    r"\$\s*(?P<monto>-?[\d,]+\.\d{2})\s*$"
+)
+
+# Corte real (aparece al final de la página donde ya no hay movimientos)
+STOP_MARKERS_TC = (
+    "TABLA / GRAFICO DE ESTADO DE CUENTA",
+    "TABLA / GRÁFICO DE ESTADO DE CUENTA",
+    "TABLA/GRAFICO DE ESTADO DE CUENTA",
+    "TABLA/GRÁFICO DE ESTADO DE CUENTA",
+)
+# Una sola búsqueda por texto en lugar de un `in` por marcador
+_RX_STOP_TC = re.compile("|".join(map(re.escape, STOP_MARKERS_TC)))
+
+# Clave de orden para fechas no parseables: van al final (como NaT con na_position="last")
+_CLAVE_SIN_FECHA = 99_999_999
+
 
 def _parse_fecha_tc(s: str) -> Optional[str]:
     """
     Convierte '08/01/25' a '2025-01-08' (ISO). Day-first.
+    Corte por posición (dd/mm/aa[aa]); pd.to_datetime por escalar es muy caro por fila.
     """
     s = (s or "").strip()
-    if not s:
+    if not PATRON_FECHA_TC.match(s):
         return None
-    dt = pd.to_datetime(s, errors="coerce", dayfirst=True)
-    if pd.isna(dt):
+    dia, mes, anio = s[0:2], s[3:5], s[6:]
+    if len(anio) == 2:
+        anio = "20" + anio
+    elif len(anio) != 4:
         return None
-    return dt.strftime("%Y-%m-%d")
+    try:
+        date(int(anio), int(mes), int(dia))  # valida día/mes (31/02 -> None)
+    except ValueError:
+        return None
+    return f"{anio}-{mes}-{dia}"
+
+
+# 1,234.56 -> 1234.56: '$', espacios y comas de miles fuera en una sola pasada
+_TR_MONTO = str.maketrans("", "", "$ ,")
+# 1234,56 -> 1234.56 (por si acaso: coma decimal, sin punto)
+_TR_MONTO_EU = str.maketrans(",", ".", "$ ")
 
 
 def _limpiar_monto(txt: str) -> Optional[float]:
     if txt is None:
         return None
-    s = str(txt).strip().replace("$", "").replace(" ", "")
+    s = str(txt).strip()
+    if "," in s and "." not in s:
+        s = s.translate(_TR_MONTO_EU)
+    else:
+        s = s.translate(_TR_MONTO)
     if not s:
         return None
-    # 1,234.56 -> 1234.56
-    if "," in s and "." in s:
-        s = s.replace(",", "")
-    # 1.234,56 -> 1234.56 (por si acaso)
-    elif "," in s and "." not in s:
-        s = s.replace(".", "").replace(",", ".")
     try:
         return float(s)
     except ValueError:
@@ -64,149 +102,130 @@ class BBVATCParser(BaseParser):
         self.cuenta_por_defecto = cuenta_por_defecto
         self.moneda_por_defecto = moneda_por_defecto or "MXN"
 
-    def parse_movimientos(self, ruta_pdf: str | Path) -> pd.DataFrame:
+    def parse_movimientos(self, ruta_pdf: str | Path, pdf: pdfplumber.PDF | None = None) -> pd.DataFrame:
         ruta_pdf = Path(ruta_pdf)
         cuenta = self.cuenta_por_defecto or ruta_pdf.stem
         moneda = self.moneda_por_defecto
 
-        movimientos: List[Dict] = []
-
-        # Corte real (aparece al final de la página donde ya no hay movimientos)
-        stop_markers = [
-            "TABLA / GRAFICO DE ESTADO DE CUENTA",
-            "TABLA / GRÁFICO DE ESTADO DE CUENTA",
-            "TABLA/GRAFICO DE ESTADO DE CUENTA",
-            "TABLA/GRÁFICO DE ESTADO DE CUENTA",
-        ]
-
-        # Regex 1: línea con RFC (ej: "... AME 1404027R0 ******7111 $ 399.00")
-        rx_con_rfc = re.compile(
-            r"^(?P<f1>\d{2}/\d{2}/\d{2,4})\s+"
-            r"(?P<f2>\d{2}/\d{2}/\d{2,4})\s+"
-            r"(?P<concepto>.+?)\s+"
-            r"(?P<rfc1>[A-ZÑ&]{3})\s+(?P<rfc2>[0-9A-Z]{8,12})\s+"
-            r"(?P<ref>[\*Xx\d]{4,})\s+"
-            r"\$\s*(?P<monto>-?[\d,]+\.\d{2})\s*$"
-        )
-
-        # Regex 2: línea SIN RFC (ej pago: "... PAGO TDC ******0110 $ -12,432.34")
-        rx_sin_rfc = re.compile(
-            r"^(?P<f1>\d{2}/\d{2}/\d{2,4})\s+"
-            r"(?P<f2>\d{2}/\d{2}/\d{2,4})\s+"
-            r"(?P<concepto>.+?)\s+"
-            r"(?P<ref>[\*Xx\d]{4,})\s+"
-            r"\$\s*(?P<monto>-?[\d,]+\.\d{2})\s*$"
-        )
-
-        # Líneas que NO son movimientos aunque parezcan texto
-        skip_starts = (
-            "ESTADO DE CUENTA",
-            "PAGINA",
-            "LINEA BBVA",
-            "AV. PASEO",
-            "BBVA MEXICO",
-            "ESTIMADO TARJETAHABIENTE",
-            "IVA",
-            "\"SI ESTAS ADHERIDO",
-            "SI ESTAS ADHERIDO",
-        )
-
-        stop_found = False
-
-        with pdfplumber.open(str(ruta_pdf)) as pdf:
+        # Una lista por columna + clave de orden (yyyymmdd de fecha_liquidacion)
+        fechas_op: list[str] = []
+        fechas_liq: list[str] = []
+        descripciones: list[str] = []
+        cargos_col: list[float | None] = []
+        abonos_col: list[float | None] = []
+        detalles: list[str] = []
+        paginas: list[int] = []
+        claves_fecha: list[int] = []
+
+        # 1) Texto de todas las páginas hasta el corte. El marcador se busca una vez
+        #    sobre el texto completo de la página; solo si aparece se ubica la línea.
+        lineas: list[tuple[int, str]] = []
+
+        with abrir_pdf(ruta_pdf, pdf) as pdf:
             for num_pagina, page in enumerate(pdf.pages, start=1):
-                if stop_found:
-                    break
-
                 text = page.extract_text() or ""
                 lines = [_norm_line(l) for l in (text.splitlines() if text else [])]
                 if not lines:
                     continue
 
-                for line in lines:
-                    if not line:
-                        continue
+                up_pagina = "\n".join(lines).upper()
+                if not _RX_STOP_TC.search(up_pagina):
+                    lineas.extend((num_pagina, line) for line in lines)
+                    continue
 
+                # ✅ CORTE POR LÍNEA (NO por página)
+                for line in lines:
                     up = line.upper()
-
-                    # ✅ CORTE POR LÍNEA (NO por página)
-                    if any(m in up for m in stop_markers):
-                        stop_found = True
+                    if _RX_STOP_TC.search(up):
                         break
-
-                    if up.startswith(skip_starts):
-                        continue
-
-                    # ignora encabezados de tabla
-                    if "FECHA" in up and "AUTORIZACION" in up and "APLICACION" in up:
-                        continue
-                    if "IMPORTE" in up and ("CARGOS" in up or "ABONOS" in up):
-                        continue
-
-                    m = rx_con_rfc.match(line)
-                    rfc = ""
-                    ref = ""
-
-                    if m:
-                        f1 = m.group("f1")
-                        f2 = m.group("f2")
-                        concepto = m.group("concepto").strip()
-                        rfc = f"{m.group('rfc1').strip()} {m.group('rfc2').strip()}".strip()
-                        ref = m.group("ref").strip()
-                        monto_txt = m.group("monto").strip()
-                    else:
-                        m2 = rx_sin_rfc.match(line)
-                        if not m2:
-                            continue
-                        f1 = m2.group("f1")
-                        f2 = m2.group("f2")
-                        concepto = m2.group("concepto").strip()
-                        ref = m2.group("ref").strip()
-                        monto_txt = m2.group("monto").strip()
-
-                    fecha_op = _parse_fecha_tc(f1) or f1
-                    fecha_liq = _parse_fecha_tc(f2) or f2
-
-                    monto = _limpiar_monto(monto_txt)
-                    if monto is None:
-                        continue
-
-                    cargos = None
-                    abonos = None
-                    if monto < 0:
-                        abonos = abs(monto)
-                    else:
-                        cargos = monto
-
-                    detalle_parts = []
-                    if rfc:
-                        detalle_parts.append(f"RFC:{rfc}")
-                    if ref:
-                        detalle_parts.append(f"REF:{ref}")
-                    detalle = " ".join(detalle_parts).strip()
-
-                    movimientos.append({
-                        "fecha_operacion": fecha_op,
-                        "fecha_liquidacion": fecha_liq,
-                        "codigo": "",
-                        "descripcion": concepto,
-                        "cargos": cargos,
-                        "abonos": abonos,
-                        "saldo_operacion": None,
-                        "saldo_liquidacion": None,
-                        "detalle": detalle,
-                        "cuenta": cuenta,
-                        "moneda": moneda,
-                        "origen_pdf": ruta_pdf.name,
-                        "pagina": num_pagina,
-                    })
-
-        if not movimientos:
+                    lineas.append((num_pagina, line))
+                break
+
+        # 2) Movimientos: una sola pasada sobre todas las líneas capturadas
+        for num_pagina, line in lineas:
+            # Un movimiento siempre empieza con fecha (dd/mm/aa): cualquier otra
+            # línea se descarta aquí, sin pasar por los filtros de texto ni el regex.
+            # Esto cubre también los textos fijos (ESTADO DE CUENTA, PAGINA, IVA, ...).
+            if not line[:1].isdigit():
+                continue
+
+            up = line.upper()
+
+            # ignora encabezados de tabla
+            if "FECHA" in up and "AUTORIZACION" in up and "APLICACION" in up:
+                continue
+            if "IMPORTE" in up and ("CARGOS" in up or "ABONOS" in up):
+                continue
+
+            m = PATRON_MOV_TC.match(line)
+            if not m:
+                continue
+
+            f1 = m.group("f1")
+            f2 = m.group("f2")
+            concepto = m.group("concepto").strip()
+            rfc = ""
+            if m.group("rfc1") is not None:
+                rfc = f"{m.group('rfc1').strip()} {m.group('rfc2').strip()}".strip()
+            ref = m.group("ref").strip()
+            monto_txt = m.group("monto").strip()
+
+            fecha_op = _parse_fecha_tc(f1) or f1
+            fecha_liq_iso = _parse_fecha_tc(f2)
+            fecha_liq = fecha_liq_iso or f2
+
+            monto = _limpiar_monto(monto_txt)
+            if monto is None:
+                continue
+
+            cargos = None
+            abonos = None
+            if monto < 0:
+                abonos = abs(monto)
+            else:
+                cargos = monto
+
+            detalle_parts = []
+            if rfc:
+                detalle_parts.append(f"RFC:{rfc}")
+            if ref:
+                detalle_parts.append(f"REF:{ref}")
+            detalle = " ".join(detalle_parts).strip()
+
+            fechas_op.append(fecha_op)
+            fechas_liq.append(fecha_liq)
+            descripciones.append(concepto)
+            cargos_col.append(cargos)
+            abonos_col.append(abonos)
+            detalles.append(detalle)
+            paginas.append(num_pagina)
+            claves_fecha.append(int(fecha_liq_iso.replace("-", "")) if fecha_liq_iso else _CLAVE_SIN_FECHA)
+
+        if not paginas:
             return pd.DataFrame()
 
-        df = pd.DataFrame(movimientos)
-
-        df["fecha_liquidacion"] = pd.to_datetime(df["fecha_liquidacion"], errors="coerce")
-        df = df.sort_values(by=["fecha_liquidacion", "pagina"], na_position="last").reset_index(drop=True)
+        # Orden por (fecha_liquidacion, pagina) sobre las claves crudas, antes de armar el
+        # DataFrame: lexsort es estable y usa la última clave como la principal
+        paginas_arr = np.array(paginas, dtype=np.int64)
+        orden = np.lexsort((paginas_arr, np.array(claves_fecha, dtype=np.int64)))
+
+        def _ordenar(valores: list) -> np.ndarray:
+            return np.array(valores, dtype=object)[orden]
+
+        df = pd.DataFrame({
+            "fecha_operacion": _ordenar(fechas_op),
+            "fecha_liquidacion": pd.to_datetime(_ordenar(fechas_liq), format="%Y-%m-%d", errors="coerce"),
+            "codigo": "",
+            "descripcion": _ordenar(descripciones),
+            "cargos": np.array(cargos_col, dtype=np.float64)[orden],
+            "abonos": np.array(abonos_col, dtype=np.float64)[orden],
+            "saldo_operacion": None,
+            "saldo_liquidacion": None,
+            "detalle": _ordenar(detalles),
+            "cuenta": cuenta,
+            "moneda": moneda,
+            "origen_pdf": ruta_pdf.name,
+            "pagina": paginas_arr[orden],
+        })
 
         return df
@@ -1,15 +1,27 @@
 # src/bancos_reader/ui/ui.py
 
+import numpy as np
 import pandas as pd
 import tkinter as tk
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+import multiprocessing
+import os
 from tkinter import ttk, filedialog, messagebox
 from pathlib import Path
 import re
 import threading
 import queue
-
-from bancos_reader.core.detector_banco import get_parser_for_file
-from bancos_reader.core.db import guardar_movimientos, listar_tablas
+import gc
+import time
+
+from bancos_reader.core.detector_banco import (
+    crear_parser,
+    detectar_parser,
+    deteccion_en_cache,
+    guardar_deteccion,
+)
+from bancos_reader.core.db import SqliteSink, listar_tablas
 from bancos_reader.transformers.plantilla import crear_df_plantilla, formatear_df_para_excel
 from bancos_reader.transformers.nombres import (
     extraer_banco_y_moneda_desde_nombre,
@@ -34,14 +46,177 @@ def log(msg: str):
         print(f"[UI] {msg}")
 
 
+class _TablaNombreSql(dict):
+    """Tabla para str.translate: todo lo que no sea [0-9a-zA-Z_] ASCII -> '_'."""
+
+    def __missing__(self, codigo: int) -> str:
+        # Cualquier carácter fuera de ASCII (é, ñ, ...) también se reemplaza
+        self[codigo] = "_"
+        return "_"
+
+
+_SQL_TRANS = _TablaNombreSql(
+    (c, chr(c) if (chr(c).isascii() and chr(c).isalnum()) or chr(c) == "_" else "_") for c in range(128)
+)
+_RE_MULTI_US = re.compile(r"_+")
+
+
 def safe_sql_table_name(name: str) -> str:
-    s = str(name)
-    s = re.sub(r"[^0-9a-zA-Z_]+", "_", s)
-    s = re.sub(r"_+", "_", s).strip("_")
+    s = str(name).translate(_SQL_TRANS)
+    s = _RE_MULTI_US.sub("_", s).strip("_")
     return s or "TABLA"
 
 
+def _clean_unique(serie: pd.Series) -> list[str]:
+    """Valores distintos, sin nulos ni vacíos, en mayúsculas y ordenados."""
+    s = serie.dropna().astype(str).str.strip().str.upper()
+    return sorted(pd.unique(s[s != ""]).tolist())
+
+
+# Motor de Excel: xlsxwriter (más rápido y ligero) si está instalado; openpyxl si no.
+# Sin constant_memory: pandas escribe las celdas por columna y ese modo exige filas en orden.
+try:
+    import xlsxwriter  # noqa: F401
+    _EXCEL_ENGINE = "xlsxwriter"
+    _EXCEL_ENGINE_KWARGS = {"options": {"strings_to_formulas": False, "strings_to_urls": False}}
+except ImportError:
+    _EXCEL_ENGINE = "openpyxl"
+    _EXCEL_ENGINE_KWARGS = {}
+
+
+def _excel_writer(ruta_excel: Path) -> pd.ExcelWriter:
+    return pd.ExcelWriter(ruta_excel, engine=_EXCEL_ENGINE, engine_kwargs=_EXCEL_ENGINE_KWARGS)
+
+
+def _congelar_encabezado(writer: pd.ExcelWriter, sheet: str) -> None:
+    hoja = writer.sheets[sheet]
+    if _EXCEL_ENGINE == "xlsxwriter":
+        hoja.freeze_panes(1, 0)
+    else:
+        hoja.freeze_panes = "A2"
+
+
+# Columnas de metadatos que se agregan por archivo. Con pyarrow instalado se guardan como
+# string[pyarrow]; las de los movimientos se quedan igual porque las consumen los transformers.
+_COLUMNAS_META = ("banco", "moneda", "tipo_producto", "cuenta", "origen_pdf")
+try:
+    import pyarrow  # noqa: F401
+    _DTYPE_TEXTO_META = "string[pyarrow]"
+except ImportError:
+    _DTYPE_TEXTO_META = None
+
+
+def _fallido(ruta: str, banco: str, moneda: str, cuenta: str, tipo: str, error: str) -> dict:
+    return {"archivo": ruta, "banco": banco, "moneda": moneda, "cuenta": cuenta, "tipo": tipo, "error": error}
+
+
+@lru_cache(maxsize=4096)
+def _meta_desde_nombre(nombre_pdf: str) -> tuple[str | None, str | None, str | None, str | None]:
+    """
+    (banco, moneda, tipo, cuenta) deducidos del nombre del archivo. Se calcula en el
+    proceso de la UI, así la caché sirve para todas las exportaciones de la sesión.
+    """
+    banco_nombre, moneda_nombre = extraer_banco_y_moneda_desde_nombre(nombre_pdf)
+    tipo_nombre, moneda_nombre2, cuenta_nombre = extraer_tipo_moneda_cuenta_desde_nombre(nombre_pdf)
+    if not moneda_nombre and moneda_nombre2:
+        moneda_nombre = moneda_nombre2
+    return banco_nombre, moneda_nombre, tipo_nombre, cuenta_nombre
+
+
+def _parse_one_pdf(
+    ruta: str,
+    nombre_pdf: str,
+    meta_nombre: tuple[str | None, str | None, str | None, str | None],
+    espec: tuple | None,
+    bancos_activos_upper: set[str],
+) -> tuple[pd.DataFrame | None, dict | None, tuple | None]:
+    """
+    Lee un PDF completo (detección + parseo + columnas de metadatos).
+    Vive a nivel de módulo para poder ejecutarse en otro proceso (ProcessPoolExecutor).
+
+    `espec` es el (clase, kwargs) que la UI ya tenía en caché para el archivo; si es
+    None se detecta aquí. Devuelve (df, fallido, espec): (df, None, ...) si hubo
+    movimientos, (None, fallido, ...) si falló y (None, None, ...) si el banco no
+    está seleccionado. El espec vuelve a la UI para que alimente su caché.
+    """
+    log(f"[PROCESO] {nombre_pdf}")
+
+    banco_nombre, moneda_nombre, tipo_nombre, cuenta_nombre = meta_nombre
+
+    try:
+        # Se decide por nombre; el detector solo abre el PDF si necesita el contenido
+        # (sniff de TC) y entonces devuelve esa sesión para que el parser la reutilice
+        pdf = None
+        if espec is None:
+            espec, pdf = detectar_parser(ruta)
+        parser = crear_parser(espec)
+        try:
+            if parser is None:
+                log(f"[SKIP] Sin parser: {nombre_pdf}")
+                return None, _fallido(ruta, banco_nombre or "", moneda_nombre or "", cuenta_nombre or "",
+                                      tipo_nombre or "", "No se encontró parser compatible."), espec
+
+            banco_parser = str(getattr(parser, "nombre_banco", "")).upper().strip()
+            banco = banco_parser or (banco_nombre or "")
+            if not banco:
+                log(f"[FAIL] No se pudo determinar banco: {nombre_pdf}")
+                return None, _fallido(ruta, "", moneda_nombre or "", cuenta_nombre or "",
+                                      tipo_nombre or "", "No se pudo determinar banco."), espec
+
+            if banco.upper() not in bancos_activos_upper:
+                log(f"[SKIP] Banco no seleccionado ({banco}): {nombre_pdf}")
+                return None, None, espec
+
+            tipo_parser = str(getattr(parser, "tipo_producto", "") or "").upper().strip()
+            tipo_final = "TC" if (tipo_nombre or "").upper().strip() == "TC" else (tipo_parser or (tipo_nombre or ""))
+
+            log(f"[PARSE] Banco={banco} | Tipo={tipo_final or '-'} | Archivo={nombre_pdf}")
+            df = parser.parse_movimientos(ruta, pdf=pdf)
+        finally:
+            if pdf is not None:
+                pdf.close()
+
+        if df is None or df.empty:
+            log(f"[WARN] df vacío: {nombre_pdf}")
+            return None, _fallido(ruta, banco, moneda_nombre or "", cuenta_nombre or "",
+                                  tipo_nombre or "", "df vacío"), espec
+
+        # Columnas de metadatos en un solo assign (en vez de una asignación por columna)
+        extra = {"banco": banco}
+        if "origen_pdf" not in df.columns:
+            extra["origen_pdf"] = nombre_pdf
+
+        extra["tipo_producto"] = tipo_final
+
+        cuenta_df_val = ""
+        if "cuenta" in df.columns:
+            s = df["cuenta"].astype(str).str.strip()
+            cuenta_df_val = (s[s.ne("")].iloc[0] if (s.ne("").any()) else "")
+
+        extra["cuenta"] = normalizar_cuenta(cuenta_df_val, cuenta_nombre, ruta)
+
+        if "moneda" not in df.columns or df["moneda"].astype(str).str.strip().eq("").all():
+            extra["moneda"] = moneda_nombre or ""
+
+        df = df.assign(**extra)
+
+        log(f"[OK] Movimientos leídos: {len(df)} | cuenta={df['cuenta'].iloc[0] if 'cuenta' in df.columns else ''}")
+        return df, None, espec
+
+    except Exception as e:
+        log(f"[ERROR] {nombre_pdf} -> {type(e).__name__}: {e}")
+        return None, _fallido(ruta, banco_nombre or "", moneda_nombre or "", cuenta_nombre or "",
+                              tipo_nombre or "", f"{type(e).__name__}: {e}"), espec
+
+
 class BankReaderApp(tk.Tk):
+    # Sondeo de _ui_queue: casi inmediato si hubo mensajes; si no, espera creciente
+    _POLL_MS_ACTIVO = 5
+    _POLL_MS_MIN = 50
+    _POLL_MS_MAX = 200
+    # Intervalo mínimo entre STATUS enviados desde el worker
+    _STATUS_MIN_S = 0.05
+
     def __init__(self):
         super().__init__()
 
@@ -72,6 +247,9 @@ class BankReaderApp(tk.Tk):
                 log(f"[WARN] No se pudo borrar DB temporal al iniciar: {type(e).__name__}: {e}")
 
         self.selected_files: list[str] = []
+        # Nombre y carpeta de cada archivo, en paralelo a selected_files (se calculan al cargar)
+        self._names: list[str] = []
+        self._parents: list[str] = []
 
         self.bank_options = ["BBVA"]
         self.bank_vars: dict[str, tk.BooleanVar] = {}
@@ -82,6 +260,13 @@ class BankReaderApp(tk.Tk):
 
         self._ui_queue: queue.Queue = queue.Queue()
         self._worker_thread: threading.Thread | None = None
+        # Cierre de ventana a mitad de exportación: el worker deja de leer/escribir y el
+        # pool de procesos se apaga sin esperar los PDFs pendientes
+        self._cancelado = threading.Event()
+        self._executor: ProcessPoolExecutor | None = None
+        # Espera entre sondeos de la cola cuando no llega nada (crece hasta _POLL_MS_MAX)
+        self._poll_ms_idle = self._POLL_MS_MIN
+        self._ultimo_status_ts = 0.0
         self.after(100, self._poll_ui_queue)
 
         self._save_reply_q: queue.Queue = queue.Queue()
@@ -91,8 +276,16 @@ class BankReaderApp(tk.Tk):
     # -------------------------------------------------------
     # helpers log + status
     # -------------------------------------------------------
-    def _log_status(self, msg: str):
+    def _log_status(self, msg: str, forzar: bool = False):
+        """
+        Loguea siempre; a la UI manda como mucho un STATUS cada _STATUS_MIN_S.
+        forzar=True para mensajes que deben verse sí o sí (p.ej. el último de una fase).
+        """
         log(msg)
+        ahora = time.monotonic()
+        if not forzar and ahora - self._ultimo_status_ts < self._STATUS_MIN_S:
+            return
+        self._ultimo_status_ts = ahora
         self._ui_queue.put(("STATUS", msg))
 
     # -------------------------------------------------------
@@ -172,7 +365,12 @@ class BankReaderApp(tk.Tk):
                 return
 
             self.selected_files.extend(nuevos)
-            self._refrescar_listbox()
+            for r in nuevos:
+                p = Path(r)
+                self._names.append(p.name)
+                self._parents.append(str(p.parent))
+            # Solo se agregan las filas nuevas (sin volver a pintar toda la lista)
+            self.listbox_archivos.insert(tk.END, *nuevos)
             self._actualizar_label_carpeta()
 
             log(f"Cargados {len(nuevos)} PDF(s). Total ahora: {len(self.selected_files)}")
@@ -203,6 +401,7 @@ class BankReaderApp(tk.Tk):
     def _exportar_excel_worker(self, bancos_activos: list[str]):
         generados, cancelados, fallidos = [], [], []
         resumen_excels = []
+        sink: SqliteSink | None = None
 
         try:
             log(f"[WORKER] Iniciando exportación | PDFs={len(self.selected_files)} | bancos_activos={bancos_activos}")
@@ -214,8 +413,11 @@ class BankReaderApp(tk.Tk):
                 except OSError:
                     pass
 
-            self._log_status("Leyendo PDFs (parser) ...")
+            self._log_status("Leyendo PDFs (parser) ...", forzar=True)
             df_total, fallidos = self._procesar_archivos(bancos_activos)
+            if self._cancelado.is_set():
+                log("[WORKER] Exportación cancelada (ventana cerrada).")
+                return
 
             if df_total is None or df_total.empty:
                 log("[WORKER] Sin movimientos totales (df_total vacío).")
@@ -228,22 +430,49 @@ class BankReaderApp(tk.Tk):
                 if col not in df_total.columns:
                     df_total[col] = ""
 
-            df_total["cuenta"] = df_total["cuenta"].astype(str).str.strip()
+            # Un solo strip sobre cuenta; si ya es string (p.ej. string[pyarrow]) no se pasa a object
+            cuenta_col = df_total["cuenta"]
+            if not isinstance(cuenta_col.dtype, pd.StringDtype):
+                cuenta_col = cuenta_col.astype(str)
+            df_total["cuenta"] = cuenta_col.str.strip().fillna("")
 
-            cuentas = sorted([c for c in df_total["cuenta"].dropna().unique() if str(c).strip()])
+            # Llave categórica (códigos enteros) para agrupar por cuenta. Las columnas del DF
+            # se quedan como texto: los transformers de plantilla/nombres esperan str.
+            clave_cuenta = df_total["cuenta"].astype("category")
+
+            cuentas = sorted(c for c in clave_cuenta.cat.categories if c)
             if not cuentas:
                 cuentas = ["SIN_CUENTA"]
                 df_total["cuenta"] = "SIN_CUENTA"
+                clave_cuenta = df_total["cuenta"].astype("category")
 
             total_cuentas = len(cuentas)
             log(f"[WORKER] Cuentas detectadas: {total_cuentas}")
 
+            # Una conexión para toda la exportación; un commit por cuenta. La DB es
+            # temporal (se borra al iniciar/cerrar), así que no necesita fsync.
+            sink = SqliteSink(self.db_path, synchronous="OFF")
+
+            # Un solo pase de hashing reparte las filas por cuenta (en vez de un filtro por cuenta)
+            grupos_cuenta = df_total.groupby(clave_cuenta, sort=False, observed=True)
+
             for i, cuenta in enumerate(cuentas, start=1):
-                df_c = df_total[df_total["cuenta"] == cuenta].copy()
+                if self._cancelado.is_set():
+                    log("[WORKER] Exportación cancelada (ventana cerrada).")
+                    return
+
+                # Suelta los DFs de la cuenta anterior (también si salió por `continue`)
+                # antes de armar los de esta: el pico de memoria es una cuenta, no dos
+                df_c = df_plantilla_raw = df_plantilla_fmt = fechas = None
+                escrituras = periodos = df_periodo = df_periodo_raw = df_periodo_excel = None
+                if i > 1:
+                    gc.collect()
 
-                bancos = sorted({str(x).strip().upper() for x in df_c.get("banco", pd.Series(dtype="object")).dropna() if str(x).strip()})
-                tipos  = sorted({str(x).strip().upper() for x in df_c.get("tipo_producto", pd.Series(dtype="object")).dropna() if str(x).strip()})
-                mons   = sorted({str(x).strip().upper() for x in df_c.get("moneda", pd.Series(dtype="object")).dropna() if str(x).strip()})
+                df_c = grupos_cuenta.get_group(cuenta)
+
+                bancos = _clean_unique(df_c.get("banco", pd.Series(dtype="object")))
+                tipos  = _clean_unique(df_c.get("tipo_producto", pd.Series(dtype="object")))
+                mons   = _clean_unique(df_c.get("moneda", pd.Series(dtype="object")))
 
                 banco_txt = bancos[0] if len(bancos) == 1 else ("MULTI" if len(bancos) > 1 else "BANCO")
                 tipo_txt  = "TC" if "TC" in tipos else ""
@@ -264,34 +493,37 @@ class BankReaderApp(tk.Tk):
                     log(f"[WORKER] Cuenta {cuenta} sin movimientos (skip).")
                     continue
 
-                self._log_status(f"Cuenta {i}/{total_cuentas}: {cuenta_txt} | movs={movs}")
+                self._log_status(f"Cuenta {i}/{total_cuentas}: {cuenta_txt} | movs={movs}", forzar=True)
 
                 cuenta_sql = safe_sql_table_name(cuenta)
 
                 df_plantilla_raw = crear_df_plantilla(df_c)
                 df_plantilla_fmt = formatear_df_para_excel(df_plantilla_raw)
 
-                # Guarda plantilla formateada en DB (debug/backup)
-                guardar_movimientos(df_plantilla_fmt, str(self.db_path), f"plantilla_fmt_{cuenta_sql}")
+                # Fechas de la cuenta: se parsean una sola vez para DB y Excel
+                fechas = pd.to_datetime(df_plantilla_raw["Fecha"], errors="coerce")
+                hay_fechas = bool(fechas.notna().any())
+
+                # Guarda plantilla formateada en DB (debug/backup) + periodos, en una transacción
+                escrituras = [(df_plantilla_fmt, f"plantilla_fmt_{cuenta_sql}")]
+
+                # Periodos (año, mes) en una sola pasada: la llave vive fuera del DF y
+                # los mismos cortes sirven para la DB y para las hojas del Excel. La llave es
+                # un solo entero (meses desde 1970); NaT -> NaN para que groupby lo descarte.
+                periodos = []
+                if hay_fechas:
+                    meses = fechas.to_numpy(dtype="datetime64[M]")
+                    clave_mes = np.where(np.isnat(meses), np.nan, meses.astype("int64"))
+                    for clave, df_periodo in df_plantilla_raw.groupby(clave_mes, sort=True):
+                        anio, mes0 = divmod(int(clave), 12)
+                        periodos.append((1970 + anio, mes0 + 1, df_periodo))
 
                 # Guardar por periodos (DB)
-                fechas_raw = pd.to_datetime(df_plantilla_raw["Fecha"], errors="coerce")
-                if fechas_raw.notna().any():
-                    tmp = df_plantilla_raw.copy()
-                    tmp["_ANIO"] = fechas_raw.dt.year
-                    tmp["_MES"] = fechas_raw.dt.month
-
-                    periodos = (
-                        tmp[["_ANIO", "_MES"]]
-                        .dropna()
-                        .drop_duplicates()
-                        .sort_values(by=["_ANIO", "_MES"])
-                        .itertuples(index=False, name=None)
-                    )
+                for anio, mes, df_periodo in periodos:
+                    escrituras.append((df_periodo, f"plantilla_{cuenta_sql}_{int(mes):02d}_{int(anio)}"))
 
-                    for anio, mes in periodos:
-                        df_periodo = tmp[(tmp["_ANIO"] == anio) & (tmp["_MES"] == mes)].drop(columns=["_ANIO", "_MES"], errors="ignore")
-                        guardar_movimientos(df_periodo, str(self.db_path), f"plantilla_{cuenta_sql}_{int(mes):02d}_{int(anio)}")
+                sink.guardar_varios(escrituras)
+                escrituras = df_periodo = None
 
                 _ = listar_tablas(self.db_path)  # debug (si quieres, loguea aquí)
 
@@ -322,47 +554,28 @@ class BankReaderApp(tk.Tk):
                         cancelados.append(cuenta)
                         continue
 
-                fechas = pd.to_datetime(df_plantilla_raw["Fecha"], errors="coerce")
-
-                if fechas.notna().sum() == 0:
-                    df_excel_unica = formatear_df_para_excel(df_plantilla_raw)
-                    with pd.ExcelWriter(ruta_excel, engine="openpyxl") as writer:
-                        df_excel_unica.to_excel(writer, sheet_name="MOVIMIENTOS", index=False)
-                        writer.sheets["MOVIMIENTOS"].freeze_panes = "A2"
+                if not hay_fechas:
+                    # Sin fechas: una sola hoja con la plantilla ya formateada para la DB
+                    with _excel_writer(ruta_excel) as writer:
+                        df_plantilla_fmt.to_excel(writer, sheet_name="MOVIMIENTOS", index=False)
+                        _congelar_encabezado(writer, "MOVIMIENTOS")
                 else:
-                    df_plantilla_raw = df_plantilla_raw.copy()
-                    df_plantilla_raw["_ANIO"] = fechas.dt.year
-                    df_plantilla_raw["_MES"] = fechas.dt.month
-
-                    periodos = (
-                        df_plantilla_raw[["_ANIO", "_MES"]]
-                        .dropna()
-                        .drop_duplicates()
-                        .sort_values(by=["_ANIO", "_MES"])
-                        .itertuples(index=False, name=None)
-                    )
-
-                    with pd.ExcelWriter(ruta_excel, engine="openpyxl") as writer:
+                    with _excel_writer(ruta_excel) as writer:
                         used = set()
                         hojas = 0
-                        for anio, mes in periodos:
-                            df_periodo_raw = df_plantilla_raw[
-                                (df_plantilla_raw["_ANIO"] == anio) & (df_plantilla_raw["_MES"] == mes)
-                            ].drop(columns=["_ANIO", "_MES"], errors="ignore")
-
+                        for anio, mes, df_periodo_raw in periodos:
                             df_periodo_excel = formatear_df_para_excel(df_periodo_raw)
 
                             base = f"{mes_nombre_es(int(mes))}_{int(anio)}"
                             sheet = excel_safe_sheet_name(base, used)
 
                             df_periodo_excel.to_excel(writer, sheet_name=sheet, index=False)
-                            writer.sheets[sheet].freeze_panes = "A2"
+                            _congelar_encabezado(writer, sheet)
                             hojas += 1
 
                         if hojas == 0:
-                            df_excel_unica = formatear_df_para_excel(df_plantilla_raw.drop(columns=["_ANIO", "_MES"], errors="ignore"))
-                            df_excel_unica.to_excel(writer, sheet_name="MOVIMIENTOS", index=False)
-                            writer.sheets["MOVIMIENTOS"].freeze_panes = "A2"
+                            df_plantilla_fmt.to_excel(writer, sheet_name="MOVIMIENTOS", index=False)
+                            _congelar_encabezado(writer, "MOVIMIENTOS")
 
                 generados.append(str(ruta_excel))
                 log(f"[WORKER] Excel generado OK -> {ruta_excel}")
@@ -381,118 +594,140 @@ class BankReaderApp(tk.Tk):
             self._ui_queue.put(("MSG_ERROR", {"title": "Error", "text": f"{type(e).__name__}: {e}"}))
             self._ui_queue.put(("DONE", {"generados": generados, "cancelados": cancelados, "fallidos": fallidos, "df_total_len": 0}))
 
+        finally:
+            if sink is not None:
+                try:
+                    sink.close()
+                except Exception as e:
+                    log(f"[WARN] No se pudo cerrar la DB temporal: {type(e).__name__}: {e}")
+
     # -------------------------------------------------------
     # Parser pipeline
     # -------------------------------------------------------
     def _procesar_archivos(self, bancos_activos: list[str]) -> tuple[pd.DataFrame, list[dict]]:
-        dfs: list[pd.DataFrame] = []
         fallidos: list[dict] = []
         bancos_activos_upper = {b.upper().strip() for b in bancos_activos}
 
-        total = len(self.selected_files)
-
-        for i, ruta in enumerate(self.selected_files, start=1):
-            ruta = str(ruta)
-            nombre_pdf = Path(ruta).name
-
-            self._log_status(f"Leyendo PDF {i}/{total}: {nombre_pdf}")
-            log(f"[PROCESO] ({i}/{total}) {nombre_pdf}")
-
-            banco_nombre, moneda_nombre = extraer_banco_y_moneda_desde_nombre(ruta)
-            tipo_nombre, moneda_nombre2, cuenta_nombre = extraer_tipo_moneda_cuenta_desde_nombre(ruta)
-            if not moneda_nombre and moneda_nombre2:
-                moneda_nombre = moneda_nombre2
+        rutas = [str(r) for r in self.selected_files]
+        nombres = list(self._names)
+        metas = [_meta_desde_nombre(n) for n in nombres]
+        # La caché de detección vive en este proceso: lo ya detectado viaja a los workers
+        especs = [deteccion_en_cache(r) for r in rutas]
+        total = len(rutas)
+
+        # Resultados en el orden de selección, aunque los procesos terminen en otro orden
+        resultados: list[tuple[pd.DataFrame | None, dict | None, tuple | None] | None] = [None] * total
+        siguiente = 0
+
+        # Los movimientos se escriben a SQLite en un hilo aparte (nunca desde los procesos).
+        # El `with` cierra hilo y conexión aunque falle el pool (si no, en Windows el handle
+        # abierto impide borrar la DB temporal en la siguiente exportación).
+        with SqliteSink(self.db_path, synchronous="OFF").start() as sink:
+            def _encolar_listos():
+                # Manda a la DB los archivos ya leídos que siguen en orden (misma secuencia que en serie)
+                nonlocal siguiente
+                if self._cancelado.is_set():
+                    return  # la ventana se cerró: la DB temporal ya se borró
+                while siguiente < total and resultados[siguiente] is not None:
+                    df = resultados[siguiente][0]
+                    if df is not None:
+                        sink.put(df, f"mov_{df['banco'].iloc[0].lower()}")
+                    siguiente += 1
+
+            if total == 1:
+                # Un solo PDF: no vale la pena levantar procesos
+                self._log_status(f"Leyendo PDF 1/1: {nombres[0]}", forzar=True)
+                resultados[0] = _parse_one_pdf(rutas[0], nombres[0], metas[0], especs[0], bancos_activos_upper)
+                _encolar_listos()
+            elif total > 1:
+                self._log_status(f"Leyendo {total} PDFs ...")
+                max_workers = min(total, os.cpu_count() or 1)
+                ex = ProcessPoolExecutor(max_workers=max_workers)
+                self._executor = ex
+                try:
+                    futures = {ex.submit(_parse_one_pdf, ruta, nombres[i], metas[i], especs[i], bancos_activos_upper): i for i, ruta in enumerate(rutas)}
+                    for n, fut in enumerate(as_completed(futures), start=1):
+                        if self._cancelado.is_set():
+                            break
+                        i = futures[fut]
+                        ruta = rutas[i]
+                        try:
+                            resultados[i] = fut.result()
+                        except Exception as e:
+                            # p.ej. el proceso murió: el archivo cuenta como fallido
+                            resultados[i] = (None, _fallido(ruta, "", "", "", "", f"{type(e).__name__}: {e}"), None)
+                            log(f"[ERROR] {nombres[i]} -> {type(e).__name__}: {e}")
+
+                        # Lo que detectó el worker queda en la caché de este proceso
+                        if especs[i] is None and resultados[i][2] is not None:
+                            guardar_deteccion(ruta, resultados[i][2])
+
+                        self._log_status(f"PDF leído {n}/{total}: {nombres[i]}", forzar=(n == total))
+                        _encolar_listos()
+                finally:
+                    self._executor = None
+                    # Si se canceló no se espera a los PDFs en curso
+                    ex.shutdown(wait=not self._cancelado.is_set(), cancel_futures=True)
 
             try:
-                parser = get_parser_for_file(ruta)
-                if parser is None:
-                    fallidos.append({
-                        "archivo": ruta, "banco": banco_nombre or "", "moneda": moneda_nombre or "",
-                        "cuenta": cuenta_nombre or "", "tipo": tipo_nombre or "",
-                        "error": "No se encontró parser compatible."
-                    })
-                    log(f"[SKIP] Sin parser: {nombre_pdf}")
-                    continue
-
-                banco_parser = str(getattr(parser, "nombre_banco", "")).upper().strip()
-                banco = banco_parser or (banco_nombre or "")
-                if not banco:
-                    fallidos.append({
-                        "archivo": ruta, "banco": "", "moneda": moneda_nombre or "",
-                        "cuenta": cuenta_nombre or "", "tipo": tipo_nombre or "",
-                        "error": "No se pudo determinar banco."
-                    })
-                    log(f"[FAIL] No se pudo determinar banco: {nombre_pdf}")
-                    continue
-
-                if banco.upper() not in bancos_activos_upper:
-                    log(f"[SKIP] Banco no seleccionado ({banco}): {nombre_pdf}")
-                    continue
-
-                tipo_parser = str(getattr(parser, "tipo_producto", "") or "").upper().strip()
-                tipo_final = "TC" if (tipo_nombre or "").upper().strip() == "TC" else (tipo_parser or (tipo_nombre or ""))
-
-                log(f"[PARSE] Banco={banco} | Tipo={tipo_final or '-'} | Archivo={nombre_pdf}")
-                df = parser.parse_movimientos(ruta)
-
-                if df is None or df.empty:
-                    fallidos.append({
-                        "archivo": ruta, "banco": banco, "moneda": moneda_nombre or "",
-                        "cuenta": cuenta_nombre or "", "tipo": tipo_nombre or "",
-                        "error": "df vacío"
-                    })
-                    log(f"[WARN] df vacío: {nombre_pdf}")
-                    continue
-
-                df["banco"] = banco
-                if "origen_pdf" not in df.columns:
-                    df["origen_pdf"] = nombre_pdf
-
-                df["tipo_producto"] = tipo_final
-
-                cuenta_df_val = ""
-                if "cuenta" in df.columns:
-                    s = df["cuenta"].astype(str).str.strip()
-                    cuenta_df_val = (s[s.ne("")].iloc[0] if (s.ne("").any()) else "")
-
-                df["cuenta"] = normalizar_cuenta(cuenta_df_val, cuenta_nombre, ruta)
-
-                if "moneda" not in df.columns or df["moneda"].astype(str).str.strip().eq("").all():
-                    df["moneda"] = moneda_nombre or ""
+                sink.join()
+            except Exception as e:
+                log(f"[WARN] No se pudieron guardar movimientos en DB: {type(e).__name__}: {e}")
 
-                guardar_movimientos(df, str(self.db_path), f"mov_{banco.lower()}")
-                log(f"[OK] Movimientos leídos: {len(df)} | cuenta={df['cuenta'].iloc[0] if 'cuenta' in df.columns else ''}")
+        if self._cancelado.is_set():
+            return pd.DataFrame(), fallidos
 
+        dfs: list[pd.DataFrame] = []
+        for df, fallido, _ in resultados:
+            if fallido is not None:
+                fallidos.append(fallido)
+            if df is not None:
                 dfs.append(df)
-
-            except Exception as e:
-                fallidos.append({
-                    "archivo": ruta, "banco": banco_nombre or "", "moneda": moneda_nombre or "",
-                    "cuenta": cuenta_nombre or "", "tipo": tipo_nombre or "",
-                    "error": f"{type(e).__name__}: {e}"
-                })
-                log(f"[ERROR] {nombre_pdf} -> {type(e).__name__}: {e}")
+        # Desde aquí los DF por archivo solo los referencia `dfs`
+        resultados.clear()
+        df = None
 
         # ✅ evita FutureWarning + concat de vacíos
         dfs = [d for d in dfs if d is not None and not d.empty]
         if not dfs:
             return pd.DataFrame(), fallidos
 
-        return pd.concat(dfs, ignore_index=True), fallidos
+        df_total = pd.concat(dfs, ignore_index=True)
+        # Ya están en la DB (mov_*) y copiados en df_total: se sueltan antes del astype
+        # y del resto de la exportación (pico ~2x los movimientos en vez de 3x)
+        dfs.clear()
+        if _DTYPE_TEXTO_META:
+            # Metadatos (mucho texto repetido) en buffers de Arrow en vez de objetos str sueltos
+            meta = [c for c in _COLUMNAS_META if c in df_total.columns]
+            df_total = df_total.astype({c: _DTYPE_TEXTO_META for c in meta})
+
+        return df_total, fallidos
 
     # -------------------------------------------------------
     # UI helpers
     # -------------------------------------------------------
+    def _aplicar_status(self, msg):
+        self.label_carpeta.config(text=str(msg))
+        self.update_idletasks()
+
     def _poll_ui_queue(self):
+        recibidos = False
+        status = None
         try:
             while True:
                 kind, payload = self._ui_queue.get_nowait()
+                recibidos = True
 
                 if kind == "STATUS":
-                    self.label_carpeta.config(text=str(payload))
-                    self.update_idletasks()
+                    # Solo importa el último: se aplica al vaciar la cola o antes del siguiente evento
+                    status = payload
+                    continue
+
+                if status is not None:
+                    self._aplicar_status(status)
+                    status = None
 
-                elif kind == "ASK_SAVE":
+                if kind == "ASK_SAVE":
                     cuenta = payload["cuenta"]
                     initialfile = payload["initialfile"]
 
@@ -577,7 +812,18 @@ class BankReaderApp(tk.Tk):
         except queue.Empty:
             pass
 
-        self.after(100, self._poll_ui_queue)
+        finally:
+            if status is not None:
+                self._aplicar_status(status)
+
+            # Siempre se reprograma (también tras los return de DONE)
+            if recibidos:
+                self._poll_ms_idle = self._POLL_MS_MIN
+                espera = self._POLL_MS_ACTIVO
+            else:
+                espera = self._poll_ms_idle
+                self._poll_ms_idle = min(self._POLL_MS_MAX, self._poll_ms_idle * 2)
+            self.after(espera, self._poll_ui_queue)
 
     def _refrescar_listbox(self):
         self.listbox_archivos.delete(0, tk.END)
@@ -588,7 +834,7 @@ class BankReaderApp(tk.Tk):
         if not self.selected_files:
             self.label_carpeta.config(text="No se han cargado archivos")
             return
-        base_dirs = {str(Path(r).parent) for r in self.selected_files}
+        base_dirs = set(self._parents)
         self.label_carpeta.config(
             text=f"Carpeta: {base_dirs.pop()}" if len(base_dirs) == 1 else "Carpetas múltiples seleccionadas"
         )
@@ -612,11 +858,15 @@ class BankReaderApp(tk.Tk):
             del self.selected_files[index]
         except IndexError:
             return
-        self._refrescar_listbox()
+        del self._names[index]
+        del self._parents[index]
+        self.listbox_archivos.delete(index)
         self._actualizar_label_carpeta()
 
     def on_reset(self):
         self.selected_files = []
+        self._names = []
+        self._parents = []
         self._refrescar_listbox()
         self.label_carpeta.config(text="No se han cargado archivos")
         for var in self.bank_vars.values():
@@ -629,6 +879,19 @@ class BankReaderApp(tk.Tk):
         messagebox.showinfo("Interfaz reiniciada", "Se han limpiado los archivos seleccionados y borrado la base temporal.")
 
     def on_close(self):
+        # Corta la exportación en curso: sin esto el hook de salida de concurrent.futures
+        # espera a que se lean todos los PDFs y el worker vuelve a crear la DB temporal
+        self._cancelado.set()
+        ex = self._executor
+        if ex is not None:
+            ex.shutdown(wait=False, cancel_futures=True)
+            # Los PDFs que ya se estaban leyendo tampoco se esperan
+            for proc in multiprocessing.active_children():
+                proc.terminate()
+        if self._worker_thread is not None and self._worker_thread.is_alive():
+            self._save_reply_q.put("")  # por si el worker espera respuesta de "Guardar como"
+            self._worker_thread.join(timeout=2)
+
         if self.db_path.exists():
             try:
                 self.db_path.unlink()
@@ -638,6 +901,8 @@ class BankReaderApp(tk.Tk):
 
 
 def main():
+    # Necesario para ProcessPoolExecutor en el ejecutable congelado (PyInstaller, Windows)
+    multiprocessing.freeze_support()
     app = BankReaderApp()
     app.mainloop()
 